@@ -0,0 +1,127 @@
+"""
+Measure how much template memory pre-forked workers share with the master.
+
+A set of templates is compiled in the master process, either with plain
+from_file calls (cold) or with holtzman.warm_up (warm), both using the same
+mmap_threshold so only the effect of warm-up is measured, then a number of
+workers are forked. Each worker renders every template, runs a full garbage
+collection as a long running worker eventually would, and reports its
+private (unique) and shared memory from /proc/self/smaps_rollup.
+
+Linux only, usage:
+
+    python benchmarks/prefork_memory.py [--templates 200] [--workers 4] [--mmap-threshold 4096]
+
+Leave out --mmap-threshold to compare without memory-mapped text.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import holtzman  # noqa: E402
+
+TEMPLATE = """<html>
+<head><style>{css}</style></head>
+<body>
+{{% for row in rows %}}
+    <tr>{{% if row.visible %}}<td>{{{{ row.name }}}}</td><td>{{{{ row.value }}}}</td>{{% end %}}</tr>
+{{% end %}}
+<p>{{{{ footer }}}}</p>
+</body>
+</html>
+"""
+
+VARIABLES = {
+    "rows": [{"visible": i % 3 != 0, "name": f"row {i}", "value": i} for i in range(50)],
+    "footer": "footer",
+}
+
+
+def write_templates(directory: str, count: int) -> List[str]:
+    paths = []
+    for index in range(count):
+        css = ''.join(f'.class-{index}-{rule} {{ margin: {rule}px; }}\n' for rule in range(200))
+        path = os.path.join(directory, f'template_{index}.hz')
+        with open(path, 'w', encoding='utf-8') as template_file:
+            template_file.write(TEMPLATE.format(css=css))
+        paths.append(path)
+    return paths
+
+
+def memory_usage() -> Tuple[int, int]:
+    private = shared = 0
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            name, _, value = line.partition(':')
+            if name in ('Private_Clean', 'Private_Dirty'):
+                private += int(value.split()[0])
+            elif name in ('Shared_Clean', 'Shared_Dirty'):
+                shared += int(value.split()[0])
+    return private, shared
+
+
+def run_worker(templates: Dict[str, "holtzman.Template"], write_fd: int) -> None:
+    for template in templates.values():
+        template.render_bytes(VARIABLES)
+    gc.collect()
+    private, shared = memory_usage()
+    os.write(write_fd, f'{private} {shared}\n'.encode())
+    os._exit(0)
+
+
+def measure(paths: List[str], workers: int, warm: bool, mmap_threshold: Optional[int]) -> List[Tuple[int, int]]:
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # compile in a fresh master so the two modes don't share state
+        os.close(read_fd)
+        if warm:
+            templates = holtzman.warm_up(paths, mmap_threshold)
+        else:
+            templates = {path: holtzman.from_file(path, mmap_threshold) for path in paths}
+
+        children = []
+        for _ in range(workers):
+            child = os.fork()
+            if child == 0:
+                run_worker(templates, write_fd)
+            children.append(child)
+        for child in children:
+            os.waitpid(child, 0)
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as results:
+        output = results.read()
+    os.waitpid(pid, 0)
+    return [(int(private), int(shared)) for private, shared in (line.split() for line in output.splitlines())]
+
+
+def report(name: str, results: List[Tuple[int, int]]) -> None:
+    print(name)
+    for index, (private, shared) in enumerate(results):
+        print(f'  worker {index}: unique {private:>8} kB  shared {shared:>8} kB')
+    average = sum(private for private, _ in results) / len(results)
+    print(f'  average unique: {average:.0f} kB')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--templates', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mmap-threshold', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_templates(directory, args.templates)
+        report('cold (from_file)', measure(paths, args.workers, False, args.mmap_threshold))
+        report('warm (warm_up)', measure(paths, args.workers, True, args.mmap_threshold))
+
+
+if __name__ == '__main__':
+    main()
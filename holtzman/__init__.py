@@ -1,20 +1,57 @@
+import gc
+import os
 from io import StringIO
-from typing import TextIO
+from mmap import mmap, ACCESS_READ
+from typing import Any, Dict, Iterable, Mapping, Optional, TextIO
 
 from .template import Template
 from .template_source import TemplateSource
 
 
-def from_string(source: str) -> "Template":
+def from_string(source: str, schema: Any = None) -> "Template":
     source_stream: StringIO = StringIO(source)
     template_source = TemplateSource(source_stream)
-    return Template(template_source)
+    return Template(template_source, schema=schema)
 
 
-def from_file(source_file: str) -> "Template":
-    source_stream: TextIO = open(source_file, 'r')
+def from_file(source_file: str, mmap_threshold: Optional[int] = None, schema: Any = None) -> "Template":
+    # with an mmap_threshold static text runs of at least that many bytes
+    # are served from a read-only memory mapping of the (utf-8) source file.
+    # the mapping stays open for the life of the template, so a mapped file
+    # must be replaced atomically (write a new file and rename it over the
+    # old one), editing it in place changes or, if truncated, crashes
+    # (SIGBUS) already compiled templates
+    if mmap_threshold is None or os.path.getsize(source_file) == 0:
+        source_stream: TextIO = open(source_file, 'r')
+        mapping: Optional[mmap] = None
+    else:
+        source_stream = open(source_file, 'r', encoding='utf-8', newline='')
+        mapping = mmap(source_stream.fileno(), 0, access=ACCESS_READ)
+
     try:
-        template_source = TemplateSource(source_stream)
-        return Template(template_source)
+        template_source = TemplateSource(source_stream, track_offsets=mapping is not None)
+        return Template(template_source, mapping, mmap_threshold or 0, schema)
     finally:
         source_stream.close()
+
+
+def warm_up(source_files: Iterable[str],
+            mmap_threshold: Optional[int] = None,
+            schemas: Optional[Mapping[str, Any]] = None) -> Dict[str, "Template"]:
+    # meant to be called in the master process of a pre-fork server: the
+    # templates are compiled, compacted and moved out of the garbage
+    # collector's generations so workers don't write to (and copy) the pages
+    # holding them when they collect. Reference counting still writes to the
+    # objects a render touches, mmap_threshold keeps large static text out of
+    # the heap entirely. schemas maps source files to the schema they are
+    # compiled against.
+    templates: Dict[str, Template] = {}
+    for source_file in source_files:
+        schema = schemas.get(source_file) if schemas is not None else None
+        template = from_file(source_file, mmap_threshold, schema)
+        template.compact()
+        templates[source_file] = template
+
+    gc.collect()
+    gc.freeze()
+    return templates
@@ -11,6 +11,12 @@ class ErrorCode(Enum):
     EMPTY_VARIABLE_STRING = auto()
     INVALID_VARIABLE_NAME = auto()
     INVALID_FOR_LOOP = auto()
+    UNKNOWN_VARIABLE = auto()
+    INVALID_SCHEMA = auto()
+    NOT_ITERABLE = auto()
+    OUTPUT_LIMIT_EXCEEDED = auto()
+    ITERATION_LIMIT_EXCEEDED = auto()
+    RENDER_DEADLINE_EXCEEDED = auto()
 
 
 class TemplateError(Exception):
@@ -39,3 +45,7 @@ class MissingVariableError(Exception):
     @property
     def variable(self) -> str:
         return self._variable
+
+
+class RenderLimitError(TemplateError):
+    pass
@@ -0,0 +1,78 @@
+from time import monotonic
+from typing import Optional, Tuple
+
+from .errors import RenderLimitError, ErrorCode as e
+
+_UNLIMITED: float = float('inf')
+
+# the clock is read on the first charge and then every this many charges
+_DEADLINE_INTERVAL: int = 64
+
+
+def utf8_size(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-8', 'surrogatepass'))
+
+
+class RenderLimits:
+    """
+    Per-render resource limits, any limit left as None is not enforced.
+
+    max_output_size is the total number of bytes (utf-8 encoded) written by
+    text and variable nodes in every render mode, max_iterations is the
+    total number of for loop iterations across all loops and timeout is the
+    wall-clock budget in seconds, checked every few nodes.
+    """
+    def __init__(self,
+                 max_output_size: Optional[int] = None,
+                 max_iterations: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.max_output_size: Optional[int] = max_output_size
+        self.max_iterations: Optional[int] = max_iterations
+        self.timeout: Optional[float] = timeout
+
+    def __repr__(self) -> str:
+        return f'render limits: {self.max_output_size}, {self.max_iterations}, {self.timeout}'
+
+
+class RenderBudget:
+    """
+    Tracks the resources used by a single render against its RenderLimits.
+
+    Renders without limits have no budget at all, nodes skip charging it.
+    Unset limits are stored as infinity so each check is a single comparison.
+    """
+    def __init__(self, limits: RenderLimits):
+        self.counts_output: bool = limits.max_output_size is not None
+        self._output_left: float = _UNLIMITED if limits.max_output_size is None else limits.max_output_size
+        self._iterations_left: float = _UNLIMITED if limits.max_iterations is None else limits.max_iterations
+        self._deadline: float = _UNLIMITED if limits.timeout is None else monotonic() + limits.timeout
+        # counting down from -1 never reaches 0, so without a timeout the
+        # clock is never read
+        self._until_deadline_check: int = -1 if limits.timeout is None else 1
+
+    def add_text(self, text: str, position: Tuple[int, int]) -> None:
+        self.add_output(utf8_size(text) if self.counts_output else 0, position)
+
+    def add_output(self, size: int, position: Tuple[int, int]) -> None:
+        self._output_left -= size
+        if self._output_left < 0:
+            raise RenderLimitError(e.OUTPUT_LIMIT_EXCEEDED, position)
+
+        self._until_deadline_check -= 1
+        if self._until_deadline_check == 0:
+            self._until_deadline_check = _DEADLINE_INTERVAL
+            if monotonic() > self._deadline:
+                raise RenderLimitError(e.RENDER_DEADLINE_EXCEEDED, position)
+
+    def add_iteration(self, position: Tuple[int, int]) -> None:
+        self._iterations_left -= 1
+        if self._iterations_left < 0:
+            raise RenderLimitError(e.ITERATION_LIMIT_EXCEEDED, position)
+
+        self._until_deadline_check -= 1
+        if self._until_deadline_check == 0:
+            self._until_deadline_check = _DEADLINE_INTERVAL
+            if monotonic() > self._deadline:
+                raise RenderLimitError(e.RENDER_DEADLINE_EXCEEDED, position)
@@ -1,20 +1,59 @@
+import sys
+from mmap import mmap
 from typing_extensions import Protocol
-from typing import List
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union, cast
 
-from .variables import VariableContext
+from .errors import MissingVariableError
+from .limits import utf8_size
+from .schema import SchemaScope
+from .variables import BoundLookup, VariableContext
+
+Writer = Callable[[Union[bytes, memoryview]], Any]
 
 
 class Node(Protocol):
     def render(self, variables: VariableContext) -> str:
         pass
 
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        pass
+
+    def compact(self) -> None:
+        pass
+
+    def bind(self, scope: SchemaScope) -> None:
+        pass
+
 
 class RootNode:
-    def __init__(self):
-        self._children: List[Node] = []
+    __slots__ = ('_position', '_children')
+
+    def __init__(self, position: Tuple[int, int] = (1, 1)):
+        self._position: Tuple[int, int] = position
+        self._children: Sequence[Node] = []
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        return self._position
+
+    @property
+    def children(self) -> Sequence[Node]:
+        return self._children
 
     def add_child(self, child: Node) -> None:
-        self._children.append(child)
+        # only called by the parser, before compact turns children into a tuple
+        cast(List[Node], self._children).append(child)
+
+    def compact(self) -> None:
+        # freeze the compiled tree, children are stored as tuples and names
+        # are interned so identical strings are shared between templates
+        for child in self._children:
+            child.compact()
+        self._children = tuple(self._children)
+
+    def bind(self, scope: SchemaScope) -> None:
+        for child in self._children:
+            child.bind(scope)
 
     def __repr__(self) -> str:
         return f'root node: {self._children}]'
@@ -25,64 +64,198 @@ class RootNode:
             result.append(node.render(variables))
         return ''.join(result)
 
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        for node in self._children:
+            node.stream(variables, write)
+
 
 class TextNode:
-    def __init__(self, text: str):
+    __slots__ = ('_text', '_size', '_position')
+
+    def __init__(self, text: str, position: Tuple[int, int]):
         self._text = text
+        self._size: int = utf8_size(text)
+        self._position: Tuple[int, int] = position
 
     def __repr__(self) -> str:
         return f'text node: "{self._text[0:20]}"'
 
-    def render(self, _variables: VariableContext) -> str:
+    def render(self, variables: VariableContext) -> str:
+        if variables.budget is not None:
+            variables.budget.add_output(self._size, self._position)
         return self._text
 
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        if variables.budget is not None:
+            variables.budget.add_output(self._size, self._position)
+        write(self._text.encode('utf-8'))
+
+    def compact(self) -> None:
+        # static text runs are unique to a template, interning them only adds
+        # them to the interpreter's intern table
+        pass
+
+    def bind(self, scope: SchemaScope) -> None:
+        pass
+
+
+class MappedTextNode:
+    __slots__ = ('_data', '_position')
+
+    def __init__(self, mapping: mmap, start: int, end: int, position: Tuple[int, int]):
+        self._data: memoryview = memoryview(mapping)[start:end]
+        self._position: Tuple[int, int] = position
+
+    def __repr__(self) -> str:
+        return f'mapped text node: {len(self._data)} bytes'
+
+    def render(self, variables: VariableContext) -> str:
+        if variables.budget is not None:
+            variables.budget.add_output(len(self._data), self._position)
+        return str(self._data, 'utf-8')
+
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        if variables.budget is not None:
+            variables.budget.add_output(len(self._data), self._position)
+        write(self._data)
+
+    def compact(self) -> None:
+        pass
+
+    def bind(self, scope: SchemaScope) -> None:
+        pass
+
 
 class VariableNode:
-    def __init__(self, variable_name: str):
+    __slots__ = ('_variable_name', '_position', '_lookup')
+
+    def __init__(self, variable_name: str, position: Tuple[int, int]):
         self._variable_name: str = variable_name
+        self._position: Tuple[int, int] = position
+        self._lookup: Optional[BoundLookup] = None
 
     def __repr__(self) -> str:
         return f'variable node: {self._variable_name}'
 
+    def _value(self, variables: VariableContext) -> Any:
+        if self._lookup is None:
+            return variables[self._variable_name]
+        return variables.lookup(self._lookup)
+
     def render(self, variables: VariableContext) -> str:
-        return variables[self._variable_name].__str__()
+        value = self._value(variables).__str__()
+        if variables.budget is not None:
+            variables.budget.add_text(value, self._position)
+        return value
+
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        data = self._value(variables).__str__().encode('utf-8')
+        if variables.budget is not None:
+            variables.budget.add_output(len(data), self._position)
+        write(data)
+
+    def compact(self) -> None:
+        self._variable_name = sys.intern(self._variable_name)
+
+    def bind(self, scope: SchemaScope) -> None:
+        self._lookup, _ = scope.bind(self._variable_name, self._position)
 
 
 class IfConditionNode(RootNode):
-    def __init__(self, variable_name: str):
+    __slots__ = ('_variable_name', '_lookup')
+
+    def __init__(self, variable_name: str, position: Tuple[int, int]):
         self._variable_name: str = variable_name
-        self._children: List[Node] = []
+        self._position: Tuple[int, int] = position
+        self._children: Sequence[Node] = []
+        self._lookup: Optional[BoundLookup] = None
 
     def __repr__(self) -> str:
         return f'if condition node: {self._variable_name}'
 
-    def render(self, variables: VariableContext) -> str:
-        var = variables[self._variable_name]
+    def condition(self, variables: VariableContext) -> bool:
+        if self._lookup is None:
+            return bool(variables[self._variable_name])
+        return bool(variables.lookup(self._lookup))
 
-        if var:
+    def render(self, variables: VariableContext) -> str:
+        if self.condition(variables):
             result = []
             for child_node in self._children:
                 result.append(child_node.render(variables))
             return ''.join(result)
         return ''
 
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        if self.condition(variables):
+            for child_node in self._children:
+                child_node.stream(variables, write)
+
+    def compact(self) -> None:
+        self._variable_name = sys.intern(self._variable_name)
+        super().compact()
+
+    def bind(self, scope: SchemaScope) -> None:
+        self._lookup, _ = scope.bind(self._variable_name, self._position)
+        super().bind(scope)
+
 
 class ForLoopNode(RootNode):
-    def __init__(self, variable_name: str, collection_name: str):
+    __slots__ = ('_variable_name', '_collection_name', '_lookup')
+
+    def __init__(self, variable_name: str, collection_name: str, position: Tuple[int, int]):
         self._variable_name = variable_name
         self._collection_name = collection_name
-        self._children: List[Node] = []
+        self._position: Tuple[int, int] = position
+        self._children: Sequence[Node] = []
+        self._lookup: Optional[BoundLookup] = None
 
     def __repr__(self) -> str:
         return f'for loop node: {self._variable_name}: {self._collection_name}'
 
+    def _collection(self, variables: VariableContext) -> Any:
+        if self._lookup is None:
+            return variables[self._collection_name]
+
+        # a None Optional collection is missing, as it is without a schema
+        collection = variables.lookup(self._lookup)
+        if collection is None:
+            raise MissingVariableError(self._collection_name)
+        return collection
+
     def render(self, variables: VariableContext) -> str:
-        collection = variables[self._collection_name]
+        collection = self._collection(variables)
+        budget = variables.budget
 
         result: List[str] = []
         for variable in collection:
+            if budget is not None:
+                budget.add_iteration(self._position)
             variables.push_context({self._variable_name: variable})
             for child in self._children:
                 result.append(child.render(variables))
             variables.pop_context()
         return ''.join(result)
+
+    def stream(self, variables: VariableContext, write: Writer) -> None:
+        collection = self._collection(variables)
+        budget = variables.budget
+
+        for variable in collection:
+            if budget is not None:
+                budget.add_iteration(self._position)
+            variables.push_context({self._variable_name: variable})
+            for child in self._children:
+                child.stream(variables, write)
+            variables.pop_context()
+
+    def compact(self) -> None:
+        self._variable_name = sys.intern(self._variable_name)
+        self._collection_name = sys.intern(self._collection_name)
+        super().compact()
+
+    def bind(self, scope: SchemaScope) -> None:
+        self._lookup, collection_type = scope.bind(self._collection_name, self._position)
+        scope.push_loop(self._variable_name, collection_type, self._position)
+        super().bind(scope)
+        scope.pop_loop()
@@ -0,0 +1,149 @@
+import types
+from collections.abc import Iterable, Mapping
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, List, Optional, Tuple, Union, get_type_hints
+
+from .errors import TemplateError, ErrorCode as e
+from .variables import BoundLookup
+
+Getter = Callable[[Any], Any]
+
+
+def _probe(part: str) -> Getter:
+    # used below values typed as Any, same rules as VariableContext
+    def getter(value: Any) -> Any:
+        if isinstance(value, dict) and part in value:
+            return value[part]
+        return getattr(value, part)
+    return getter
+
+
+def _return_type(function: Any) -> Any:
+    try:
+        return get_type_hints(function).get('return', Any)
+    except (TypeError, NameError):
+        return Any
+
+
+def _unwrap_optional(schema: Any) -> Any:
+    union_type = getattr(types, 'UnionType', None)
+    if getattr(schema, '__origin__', None) is Union or (union_type is not None and isinstance(schema, union_type)):
+        args = [arg for arg in schema.__args__ if arg is not type(None)]
+        return args[0] if len(args) == 1 else Any
+    return schema
+
+
+def _is_typed_dict(schema: Any) -> bool:
+    return isinstance(schema, type) and issubclass(schema, dict) and hasattr(schema, '__annotations__')
+
+
+def _bind_part(schema: Any, part: str) -> Optional[Tuple[Getter, Any]]:
+    schema = _unwrap_optional(schema)
+
+    if schema is Any:
+        return _probe(part), Any
+
+    if _is_typed_dict(schema):
+        hints = get_type_hints(schema)
+        return (itemgetter(part), hints[part]) if part in hints else None
+
+    origin = getattr(schema, '__origin__', None)
+    if origin is not None:
+        if isinstance(origin, type) and issubclass(origin, Mapping):
+            args = getattr(schema, '__args__', None) or (Any, Any)
+            return itemgetter(part), args[1]
+        return None
+
+    if isinstance(schema, type) and issubclass(schema, Mapping):
+        return itemgetter(part), Any
+
+    if isinstance(schema, type):
+        hints = get_type_hints(schema)
+        if part in hints:
+            return attrgetter(part), hints[part]
+
+        if part in getattr(schema, '_fields', ()):
+            return attrgetter(part), Any
+
+        # properties and methods, methods are called like lazy values
+        attribute = getattr(schema, part, None)
+        if isinstance(attribute, property):
+            return attrgetter(part), _return_type(attribute.fget)
+        if callable(attribute):
+            return attrgetter(part), _return_type(attribute)
+
+    return None
+
+
+def _is_iterable(schema: Any) -> bool:
+    schema = _unwrap_optional(schema)
+    if schema is Any:
+        return True
+
+    origin = getattr(schema, '__origin__', None)
+    if origin is not None:
+        return not isinstance(origin, type) or issubclass(origin, Iterable)
+    if isinstance(schema, type):
+        return issubclass(schema, Iterable)
+    # type variables and the like can't be checked
+    return True
+
+
+def _element_type(schema: Any) -> Any:
+    schema = _unwrap_optional(schema)
+    origin = getattr(schema, '__origin__', None)
+    args = getattr(schema, '__args__', None)
+
+    if isinstance(origin, type) and issubclass(origin, Iterable) and args:
+        if origin is tuple and not (len(args) == 2 and args[1] is Ellipsis):
+            return Any
+        return args[0]
+    return Any
+
+
+class SchemaScope:
+    """
+    Resolves variable paths against a declared context type at compile time,
+    tracking the element types bound by enclosing for loops.
+    """
+    def __init__(self, schema: Any):
+        self._schema: Any = schema
+        self._loops: List[Tuple[str, Any]] = []
+
+    def push_loop(self, variable_name: str, collection_type: Any, position: Tuple[int, int]) -> None:
+        if not _is_iterable(collection_type):
+            raise TemplateError(e.NOT_ITERABLE, position)
+        self._loops.append((variable_name, _element_type(collection_type)))
+
+    def pop_loop(self) -> None:
+        self._loops.pop()
+
+    def bind(self, key: str, position: Tuple[int, int]) -> Tuple[BoundLookup, Any]:
+        parts: List[str] = key.split('.')
+        getters: List[Getter] = []
+
+        # loop variables shadow the root context, innermost first
+        for depth in range(len(self._loops), 0, -1):
+            variable_name, schema = self._loops[depth - 1]
+            if variable_name == parts[0]:
+                context_index = -(depth + 1)
+                getters.append(itemgetter(variable_name))
+                parts = parts[1:]
+                break
+        else:
+            context_index = -1
+            schema = self._schema
+
+        for part in parts:
+            try:
+                bound = _bind_part(schema, part)
+            except NameError as error:
+                # annotations that can't be resolved, e.g. forward references
+                # to locally defined classes
+                raise TemplateError(e.INVALID_SCHEMA, position) from error
+            if bound is None:
+                raise TemplateError(e.UNKNOWN_VARIABLE, position)
+            getter, schema = bound
+            getters.append(getter)
+
+        return BoundLookup(key, context_index, getters), schema
@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .limits import RenderLimits
+from .nodes import Node, RootNode, IfConditionNode
+from .variables import VariableContext
+
+
+class _CachedRender:
+    def __init__(self, dependencies: Dict[str, Any], output: str, children: Dict[int, "_CachedRender"]):
+        self.dependencies: Dict[str, Any] = dependencies
+        self.output: str = output
+        self.children: Dict[int, "_CachedRender"] = children
+
+
+def _paths_overlap(dependency: str, changed: str) -> bool:
+    # a change to 'a' affects 'a.b' and a change to 'a.b' affects 'a'
+    return (dependency == changed
+            or dependency.startswith(changed + '.')
+            or changed.startswith(dependency + '.'))
+
+
+class RenderSession:
+    """
+    Re-renders a template, reusing the output of if conditions and for loops
+    whose variables have not changed since the previous render.
+
+    Only variables resolved from the root context are tracked, so the output
+    of a block is cached as a whole and loop bodies are not cached per item.
+    When no change set is given a block is reused only if each tracked
+    variable is still the same object, values that are equal are not enough
+    as they may render differently (1 and True), and values mutated in place
+    must be reported in the change set.
+    """
+    def __init__(self, root: RootNode):
+        self._root: RootNode = root
+        self._cache: Dict[int, _CachedRender] = {}
+
+    def render(self, variables: Any, changed: Optional[Iterable[str]] = None, limits: Optional[RenderLimits] = None) -> str:
+        context = VariableContext(variables, limits)
+        changed_paths: Optional[List[str]] = None if changed is None else list(changed)
+        cache: Dict[int, _CachedRender] = {}
+
+        result = self._render_children(self._root.children, context, variables, changed_paths, self._cache, cache)
+        self._cache = cache
+        return result
+
+    def _render_children(self,
+                         children: Sequence[Node],
+                         context: VariableContext,
+                         variables: Any,
+                         changed: Optional[List[str]],
+                         old_cache: Dict[int, _CachedRender],
+                         new_cache: Dict[int, _CachedRender]) -> str:
+        result: List[str] = []
+        for child in children:
+            if isinstance(child, RootNode):
+                result.append(self._render_block(child, context, variables, changed, old_cache, new_cache))
+            else:
+                result.append(child.render(context))
+        return ''.join(result)
+
+    def _render_block(self,
+                      node: RootNode,
+                      context: VariableContext,
+                      variables: Any,
+                      changed: Optional[List[str]],
+                      old_cache: Dict[int, _CachedRender],
+                      new_cache: Dict[int, _CachedRender]) -> str:
+        cached = old_cache.get(id(node))
+        if cached is not None and self._is_unchanged(cached, context, variables, changed):
+            context.add_dependencies(cached.dependencies)
+            if context.budget is not None:
+                context.budget.add_text(cached.output, node.position)
+            new_cache[id(node)] = cached
+            return cached.output
+
+        children: Dict[int, _CachedRender] = {}
+        context.begin_tracking()
+        if isinstance(node, IfConditionNode):
+            # the body of an if condition renders in the same scope, so its
+            # blocks can be cached individually
+            output = ''
+            if node.condition(context):
+                old_children = cached.children if cached is not None else {}
+                output = self._render_children(node.children, context, variables, changed, old_children, children)
+        else:
+            output = node.render(context)
+        dependencies = context.end_tracking()
+
+        new_cache[id(node)] = _CachedRender(dependencies, output, children)
+        return output
+
+    def _is_unchanged(self, cached: _CachedRender, context: VariableContext, variables: Any, changed: Optional[List[str]]) -> bool:
+        if changed is not None:
+            return not any(_paths_overlap(dependency, path) for dependency in cached.dependencies for path in changed)
+
+        for path, old_value in cached.dependencies.items():
+            value = context.find_var_in_context(variables, path.split('.'))
+            if value is not old_value:
+                return False
+        return True
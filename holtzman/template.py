@@ -1,23 +1,46 @@
-from typing import List, Any
+from mmap import mmap
+from typing import List, Any, BinaryIO, Optional, Tuple, Union
 
 from .errors import TemplateError, ErrorCode as e
-from .nodes import RootNode, TextNode, VariableNode, IfConditionNode, ForLoopNode
+from .limits import RenderLimits
+from .nodes import RootNode, TextNode, MappedTextNode, VariableNode, IfConditionNode, ForLoopNode
+from .schema import SchemaScope
+from .session import RenderSession
 from .template_source import TemplateSource
 from .variables import VariableContext
 
 
 class Template:
-    def __init__(self, source):
+    def __init__(self, source, mapping: Optional[mmap] = None, mapping_threshold: int = 0, schema: Any = None):
+        # when a memory mapping of the source is given, text runs of at least
+        # mapping_threshold bytes are kept as offsets into it instead of as str.
+        # when a schema (the type of the render context) is given, variable
+        # paths are checked and bound to direct key or attribute access
         self._source: TemplateSource = source
+        self._mapping: Optional[mmap] = mapping
+        self._mapping_threshold: int = mapping_threshold
         self._buffer: List[str] = []
+        self._buffer_position: Tuple[int, int] = (1, 1)
+        self._buffer_offset: int = 0
+        self._buffer_verbatim: bool = True
+        self._buffer_translations: int = 0
         self._current_node: RootNode = RootNode()
         self._node_stack: List[RootNode] = []
+        self._compacted: bool = False
         self._parse_template()
 
+        if schema is not None:
+            self._current_node.bind(SchemaScope(schema))
+
     def _parse_template(self) -> None:
         self._source.read_char()
         while self._source.current_char != '':
             self._source.add_bookmark()
+            if len(self._buffer) == 0:
+                self._buffer_position = self._source.bookmark
+                self._buffer_offset = self._source.offset
+                self._buffer_verbatim = True
+                self._buffer_translations = self._source.translations
             if self._source.current_char == "{":
                 self._handle_template_string()
             elif self._source.current_char == "\\":
@@ -26,13 +49,33 @@ class Template:
                 self._buffer.append(self._source.current_char)
             self._source.remove_bookmark()
             self._source.read_char()
-        self._create_text_node(''.join(self._buffer))
+        self._create_text_node(''.join(self._buffer), self._source.offset)
 
         if len(self._node_stack) != 0:
             raise TemplateError(e.MISSING_END_STATEMENT, self._source.position)
 
-    def render(self, variables: Any) -> str:
-        return self._current_node.render(VariableContext(variables))
+    def render(self, variables: Any, limits: Optional[RenderLimits] = None) -> str:
+        return self._current_node.render(VariableContext(variables, limits))
+
+    def render_bytes(self, variables: Any, limits: Optional[RenderLimits] = None) -> bytes:
+        result: List[Union[bytes, memoryview]] = []
+        self._current_node.stream(VariableContext(variables, limits), result.append)
+        return b''.join(result)
+
+    def stream(self, variables: Any, output: BinaryIO, limits: Optional[RenderLimits] = None) -> None:
+        self._current_node.stream(VariableContext(variables, limits), output.write)
+
+    def session(self) -> RenderSession:
+        return RenderSession(self._current_node)
+
+    def compact(self) -> None:
+        # the parser state (including any in-memory copy of the source) is
+        # not needed once the template is compiled
+        if self._compacted:
+            return
+        del self._source, self._buffer, self._node_stack
+        self._current_node.compact()
+        self._compacted = True
 
     def _push_node(self) -> None:
         self._node_stack.append(self._current_node)
@@ -45,13 +88,14 @@ class Template:
         return node
 
     def _handle_template_string(self) -> None:
+        offset = self._source.offset
         self._source.read_char()
         if self._source.current_char == '%':
-            self._create_text_node(''.join(self._buffer))
+            self._create_text_node(''.join(self._buffer), offset)
             self._buffer = []
             self._handle_if_or_loop()
         elif self._source.current_char == '{':
-            self._create_text_node(''.join(self._buffer))
+            self._create_text_node(''.join(self._buffer), offset)
             self._buffer = []
             self._handle_variable()
         else:
@@ -62,6 +106,7 @@ class Template:
 
     def _handle_escape_char(self) -> None:
         self._source.read_char()
+        self._buffer_verbatim = False
         if self._source.current_char == '{':
             self._buffer.append('{')
         elif self._source.current_char == '\\':
@@ -69,9 +114,16 @@ class Template:
         else:
             raise TemplateError(e.INVALID_ESCAPE_SEQUENCE, self._source.bookmark)
 
-    def _create_text_node(self, value: str) -> None:
-        if len(value) > 0:
-            self._current_node.add_child(TextNode(value))
+    def _create_text_node(self, value: str, end_offset: int) -> None:
+        if len(value) == 0:
+            return
+
+        if (self._mapping is not None and self._buffer_verbatim
+                and self._source.translations == self._buffer_translations
+                and end_offset - self._buffer_offset >= self._mapping_threshold):
+            self._current_node.add_child(MappedTextNode(self._mapping, self._buffer_offset, end_offset, self._buffer_position))
+        else:
+            self._current_node.add_child(TextNode(value, self._buffer_position))
 
     def _consume_space(self) -> None:
         # skip characters until we find a non-space char or EOF
@@ -85,7 +137,7 @@ class Template:
             self._source.read_char()
         return ''.join(buffer)
 
-    def _handle_for_loop(self) -> None:
+    def _handle_for_loop(self, position: Tuple[int, int]) -> None:
         self._consume_space()
         self._source.add_bookmark()
         variable_name = self._read_variable_name()
@@ -107,15 +159,15 @@ class Template:
         self._consume_space()
         self._read_end_statement("%}")
         self._push_node()
-        self._current_node = ForLoopNode(variable_name, collection_name)
+        self._current_node = ForLoopNode(variable_name, collection_name, position)
 
-    def _handle_if_condition(self) -> None:
+    def _handle_if_condition(self, position: Tuple[int, int]) -> None:
         self._consume_space()
         variable_name_list = self._read_variable_name()
         self._consume_space()
         self._read_end_statement("%}")
         self._push_node()
-        self._current_node = IfConditionNode(variable_name_list)
+        self._current_node = IfConditionNode(variable_name_list, position)
 
     def _handle_variable(self):
         self._source.read_char()
@@ -123,7 +175,7 @@ class Template:
         variable_name_list = self._read_variable_name()
         self._consume_space()
         self._read_end_statement("}}")
-        self._current_node.add_child(VariableNode(variable_name_list))
+        self._current_node.add_child(VariableNode(variable_name_list, self._source.bookmark))
 
     def _read_variable_name(self) -> str:
         buffer: List[str] = []
@@ -152,11 +204,12 @@ class Template:
         self._source.read_char()  # consume the %
         self._consume_space()
 
+        position = self._source.bookmark
         keyword = self._read_until_space()
         if keyword == 'for':
-            self._handle_for_loop()
+            self._handle_for_loop(position)
         elif keyword == 'if':
-            self._handle_if_condition()
+            self._handle_if_condition(position)
         elif keyword == 'end':
             self._handle_end_statement()
         else:
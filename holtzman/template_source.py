@@ -1,13 +1,23 @@
-from typing import Tuple, List
+from typing import Callable, Tuple, List, Optional
 from .input_stream import InputStream
 
 
 class TemplateSource:
-    def __init__(self, source: InputStream):
+    def __init__(self, source: InputStream, track_offsets: bool = False):
+        # with track_offsets the source must be read without newline
+        # translation (newline=''), the utf-8 byte offset of each char is
+        # tracked and '\r\n' or '\r' are translated to '\n' here so the
+        # parser sees the same chars as with universal newlines
         self._source: InputStream = source
+        self._read: Callable[[int], str] = self._read_tracked if track_offsets else source.read
         self._line: int = 1
         self._column: int = 0
         self._current_char: str = ''
+        self._offset: int = 0
+        self._char_size: int = 0
+        self._pending: Optional[str] = None
+        self._translations: int = 0
+        self._current_translated: bool = False
         self._bookmarks: List[Tuple[int, int]] = [(1, 1)]
 
     @property
@@ -18,6 +28,17 @@ class TemplateSource:
     def position(self) -> Tuple[int, int]:
         return (self._line, self._column)
 
+    @property
+    def offset(self) -> int:
+        # utf-8 byte offset of the current char, only tracked if enabled
+        return self._offset
+
+    @property
+    def translations(self) -> int:
+        # number of translated newlines before the current char, text
+        # containing one doesn't match the source bytes
+        return self._translations
+
     @property
     def bookmark(self) -> Tuple[int, int]:
         return self._bookmarks[-1]
@@ -29,9 +50,31 @@ class TemplateSource:
         self._bookmarks.pop()
 
     def read_char(self) -> None:
-        self._current_char = self._source.read(1)
+        self._current_char = self._read(1)
         if self._current_char == "\n":
             self._line += 1
             self._column = 1
         else:
             self._column += 1
+
+    def _read_tracked(self, _number: int) -> str:
+        self._offset += self._char_size
+        self._translations += self._current_translated
+        self._current_translated = False
+        if self._pending is not None:
+            char, self._pending = self._pending, None
+        else:
+            char = self._source.read(1)
+
+        size = 1 if char < '\x80' else len(char.encode('utf-8'))
+        if char == '\r':
+            self._current_translated = True
+            following = self._source.read(1)
+            if following == '\n':
+                size += 1
+            else:
+                self._pending = following
+            char = '\n'
+
+        self._char_size = size if char != '' else 0
+        return char
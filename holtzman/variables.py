@@ -1,11 +1,89 @@
-from typing import Any, List
+from inspect import Parameter, signature
+from types import MethodType
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
 
 from .errors import MissingVariableError
+from .limits import RenderBudget, RenderLimits
+
+
+class Lazy:
+    """
+    Wraps a zero argument function whose result is only computed when a
+    template first uses the value, the result is reused for the rest of
+    that render.
+    """
+    def __init__(self, function: Callable[[], Any]):
+        self._function: Callable[[], Any] = function
+
+    def __repr__(self) -> str:
+        return f'lazy: {self._function}'
+
+    def __call__(self) -> Any:
+        return self._function()
+
+
+class BoundLookup:
+    """
+    A variable path bound at compile time: the context it is read from
+    (an index into the context stack, -1 being the root) and the key or
+    attribute getter for each part of the path.
+    """
+    __slots__ = ('key', 'context_index', 'getters')
+
+    def __init__(self, key: str, context_index: int, getters: Sequence[Callable[[Any], Any]]):
+        self.key: str = key
+        self.context_index: int = context_index
+        self.getters: Tuple[Callable[[Any], Any], ...] = tuple(getters)
+
+    def __repr__(self) -> str:
+        return f'bound lookup: {self.key}: {self.context_index}'
+
+
+_REQUIRED_KINDS = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY)
+
+# keyed on the inspected function, each entry records whether it can be
+# called without arguments as is and when bound to an object (self removed)
+_zero_argument_cache: "WeakKeyDictionary[Any, Tuple[bool, bool]]" = WeakKeyDictionary()
+
+
+def _no_required_parameters(parameters: List[Parameter]) -> bool:
+    return not any(p.default is Parameter.empty and p.kind in _REQUIRED_KINDS for p in parameters)
+
+
+def _inspect_arguments(function: Any) -> Tuple[bool, bool]:
+    try:
+        parameters = list(signature(function).parameters.values())
+    except (TypeError, ValueError):
+        return False, False
+
+    bound = parameters
+    if len(parameters) != 0 and parameters[0].kind in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD):
+        bound = parameters[1:]
+    return _no_required_parameters(parameters), _no_required_parameters(bound)
+
+
+def _takes_no_arguments(function: Any) -> bool:
+    is_method = isinstance(function, MethodType)
+    key = function.__func__ if is_method else function
+    try:
+        result = _zero_argument_cache[key]
+    except (KeyError, TypeError):
+        result = _inspect_arguments(key)
+        try:
+            _zero_argument_cache[key] = result
+        except TypeError:
+            pass  # not weak referenceable, e.g. builtins
+    return result[1] if is_method else result[0]
 
 
 class VariableContext:
-    def __init__(self, variables: Any):
+    def __init__(self, variables: Any, limits: Optional[RenderLimits] = None):
         self._contexts: List[Any] = [variables]
+        self._resolved: Dict[Hashable, Tuple[Any, Any]] = {}
+        self._dependencies: List[Dict[str, Any]] = []
+        # None when the render has no limits, nodes skip charging it
+        self.budget: Optional[RenderBudget] = None if limits is None else RenderBudget(limits)
 
     def push_context(self, variables: Any) -> None:
         self._contexts.insert(0, variables)
@@ -16,13 +94,47 @@ class VariableContext:
     def __repr__(self) -> str:
         return self._contexts.__str__()
 
+    def begin_tracking(self) -> None:
+        # record every variable resolved from the root context until the
+        # matching end_tracking call, nested tracking is merged into its parent
+        self._dependencies.append({})
+
+    def end_tracking(self) -> Dict[str, Any]:
+        dependencies = self._dependencies.pop()
+        self.add_dependencies(dependencies)
+        return dependencies
+
+    def add_dependencies(self, dependencies: Dict[str, Any]) -> None:
+        if len(self._dependencies) != 0:
+            self._dependencies[-1].update(dependencies)
+
+    def resolve(self, value: Any) -> Any:
+        # lazy values are Lazy instances and callables without required
+        # arguments (classes excluded), other callables are left as values.
+        # the result is memoized for this render, the callable is stored with
+        # its result so its id can't be reused while the render runs, bound
+        # methods are recreated on each getattr so are keyed on their parts
+        if not callable(value) or isinstance(value, type):
+            return value
+
+        if isinstance(value, MethodType):
+            key: Hashable = (id(value.__self__), id(value.__func__))
+        else:
+            key = id(value)
+
+        if key not in self._resolved:
+            if not isinstance(value, Lazy) and not _takes_no_arguments(value):
+                return value
+            self._resolved[key] = (value, value())
+        return self._resolved[key][1]
+
     def find_var_in_context(self, context, key_parts):
         current_context = context
         for part in key_parts:
             if isinstance(current_context, dict) and (part in current_context):
-                current_context = current_context[part]
+                current_context = self.resolve(current_context[part])
             elif hasattr(current_context, part):
-                current_context = getattr(current_context, part)
+                current_context = self.resolve(getattr(current_context, part))
             else:
                 return None
         return current_context
@@ -33,6 +145,24 @@ class VariableContext:
         for context in self._contexts:
             var = self.find_var_in_context(context, key_parts)
             if var is not None:
+                if len(self._dependencies) != 0 and context is self._contexts[-1]:
+                    self._dependencies[-1][key] = var
                 return var
 
         raise MissingVariableError(key)
+
+    def lookup(self, bound: BoundLookup) -> Any:
+        # unlike __getitem__ a value that is present but None is returned
+        # only the getters are guarded, errors raised by lazy values propagate.
+        # TypeError covers key access on a None optional mapping
+        var = self._contexts[bound.context_index]
+        for getter in bound.getters:
+            try:
+                var = getter(var)
+            except (KeyError, AttributeError, TypeError):
+                raise MissingVariableError(bound.key)
+            var = self.resolve(var)
+
+        if len(self._dependencies) != 0 and bound.context_index == -1:
+            self._dependencies[-1][bound.key] = var
+        return var
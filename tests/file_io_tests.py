@@ -2,7 +2,15 @@
 Test templates can be read from files
 """
 import os
+from io import BytesIO
+
 import holtzman
+from holtzman.nodes import MappedTextNode
+
+
+def _template_file(name):
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    return f'{dir_path}/templates/{name}'
 
 
 class FileIOTests:
@@ -10,3 +18,49 @@ class FileIOTests:
         dir_path = os.path.dirname(os.path.realpath(__file__))
         test_file = f'{dir_path}/templates/example_template.hz'
         holtzman.from_file(test_file)
+
+    def test_memory_mapped_template_renders_same_as_unmapped(self):
+        test_file = _template_file('example_template.hz')
+        variables = {"items": ["one", "two"]}
+        template = holtzman.from_file(test_file)
+        mapped_template = holtzman.from_file(test_file, mmap_threshold=0)
+
+        assert mapped_template.render(variables) == template.render(variables)
+        assert mapped_template.render_bytes(variables) == template.render(variables).encode('utf-8')
+
+    def test_memory_mapped_text_is_streamed_from_mapping(self):
+        test_file = _template_file('example_template.hz')
+        template = holtzman.from_file(test_file, mmap_threshold=16)
+        assert any(isinstance(node, MappedTextNode) for node in template._current_node._children)
+
+        output = BytesIO()
+        template.stream({"items": ["one"]}, output)
+        assert output.getvalue() == template.render({"items": ["one"]}).encode('utf-8')
+
+    def test_memory_mapped_offsets_handle_multibyte_characters_and_escapes(self, tmp_path):
+        test_file = tmp_path / 'template.hz'
+        test_file.write_text("héllo {{ name }} \\{ wörld {{ name }} ✓", encoding='utf-8')
+        template = holtzman.from_file(str(test_file), mmap_threshold=0)
+
+        assert template.render({"name": "ñ"}) == "héllo ñ { wörld ñ ✓"
+        assert template.render_bytes({"name": "ñ"}) == "héllo ñ { wörld ñ ✓".encode('utf-8')
+
+    def test_text_below_threshold_is_not_mapped(self):
+        template = holtzman.from_file(_template_file('example_template.hz'), mmap_threshold=1 << 20)
+        assert not any(isinstance(node, MappedTextNode) for node in template._current_node._children)
+
+    def test_empty_file_can_be_mapped(self, tmp_path):
+        test_file = tmp_path / 'template.hz'
+        test_file.write_text("")
+        template = holtzman.from_file(str(test_file), mmap_threshold=0)
+        assert template.render_bytes({}) == b""
+
+    def test_memory_mapped_template_translates_line_endings(self, tmp_path):
+        test_file = tmp_path / 'template.hz'
+        test_file.write_bytes(b"line 1\r\nline 2\rline 3\n{{ name }}\r\n{% if name %}\r\nend{% end %}\r")
+        variables = {"name": "value"}
+        template = holtzman.from_file(str(test_file))
+        mapped_template = holtzman.from_file(str(test_file), mmap_threshold=0)
+
+        assert mapped_template.render(variables) == template.render(variables) == "line 1\nline 2\nline 3\nvalue\n\nend\n"
+        assert mapped_template.render_bytes(variables) == template.render_bytes(variables)
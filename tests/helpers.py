@@ -0,0 +1,25 @@
+"""
+Helpers shared between test modules
+"""
+
+
+class Counter:
+    """zero argument callable that counts how often it is called"""
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class Renderable:
+    """value that counts how often it is rendered"""
+    def __init__(self, text):
+        self.text = text
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return self.text
@@ -0,0 +1,105 @@
+"""
+Test lazy variables, for example:
+
+    template.render({"variable": Lazy(expensive_function)})
+
+should only call expensive_function if the template uses the variable, and
+only once per render
+"""
+from collections import namedtuple
+
+import pytest
+
+import holtzman
+from holtzman.variables import Lazy
+
+from .helpers import Counter
+
+
+class LazyVariableTests:
+    def test_lazy_variable_is_substituted(self):
+        template = holtzman.from_string("{{ variable }}")
+        result = template.render({"variable": Lazy(lambda: "value")})
+        assert result == "value"
+
+    def test_zero_argument_callable_is_substituted(self):
+        template = holtzman.from_string("{{ variable }}")
+        result = template.render({"variable": lambda: "value"})
+        assert result == "value"
+
+    def test_lazy_variable_not_evaluated_if_unused(self):
+        template = holtzman.from_string("{% if condition %}{{ variable }}{% end %}")
+        counter = Counter("value")
+        result = template.render({"condition": False, "variable": Lazy(counter)})
+
+        assert result == ""
+        assert counter.calls == 0
+
+    def test_lazy_variable_evaluated_once_per_render(self):
+        source = "{% for var in variables %}{{ nested.value }}{% end %}{{ nested.value }}"
+        template = holtzman.from_string(source)
+        counter = Counter({"value": "x"})
+        variables = {"variables": [1, 2, 3], "nested": Lazy(counter)}
+
+        assert template.render(variables) == "xxxx"
+        assert counter.calls == 1
+
+        template.render(variables)
+        assert counter.calls == 2
+
+    def test_lazy_collection_in_for_loop(self):
+        template = holtzman.from_string("{% for var in variables %}{{ var }}{% end %}")
+        result = template.render({"variables": Lazy(lambda: ["a", "b", "c"])})
+        assert result == "abc"
+
+    def test_object_method_is_evaluated_once_per_render(self):
+        class Object:
+            calls = 0
+
+            def value(self):
+                self.calls += 1
+                return "value"
+
+        obj = Object()
+        template = holtzman.from_string("{{ obj.value }} {{ obj.value }}")
+        result = template.render({"obj": obj})
+
+        assert result == "value value"
+        assert obj.calls == 1
+
+    def test_classes_are_not_evaluated(self):
+        TestObj = namedtuple('TestObj', ['value'])
+        template = holtzman.from_string("{{ cls.__name__ }}")
+        result = template.render({"cls": TestObj})
+        assert result == "TestObj"
+
+    def test_callables_with_required_arguments_are_not_evaluated(self):
+        class Object:
+            def method(self, argument):
+                return argument
+
+        def function(a, b):
+            return a
+
+        obj = Object()
+        template = holtzman.from_string("{% if f %}{{ o.method }}|{{ f }}{% end %}")
+        result = template.render({"f": function, "o": obj})
+        assert result == f"{obj.method}|{function}"
+
+    def test_callables_with_optional_arguments_are_evaluated(self):
+        template = holtzman.from_string("{{ f }}")
+        assert template.render({"f": lambda a=1, *args, **kwargs: a}) == "1"
+
+    @pytest.mark.parametrize('first, second', [("method", "function"), ("function", "method")])
+    def test_method_and_its_function_are_inspected_separately(self, first, second):
+        class Object:
+            def value(self):
+                return "value"
+
+        sources = {
+            "method": ("{{ o.value }}", {"o": Object()}, "value"),
+            "function": ("{{ f }}", {"f": Object.value}, str(Object.value)),
+        }
+        for name in (first, second):
+            source, variables, expected = sources[name]
+            assert holtzman.from_string(source).render(variables) == expected
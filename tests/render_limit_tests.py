@@ -0,0 +1,93 @@
+"""
+Test render limits, for example:
+
+    template.render(variables, RenderLimits(max_iterations=100))
+
+should abort the render with a RenderLimitError pointing at the node that
+exceeded the limit
+"""
+import pytest
+
+import holtzman
+from holtzman.errors import RenderLimitError, TemplateError, ErrorCode
+from holtzman.limits import RenderLimits
+
+
+class RenderLimitTests:
+    def test_render_within_limits_succeeds(self):
+        template = holtzman.from_string("{% for var in variables %}{{ var }}{% end %}")
+        limits = RenderLimits(max_output_size=3, max_iterations=3, timeout=10)
+        result = template.render({"variables": ["a", "b", "c"]}, limits)
+        assert result == "abc"
+
+    def test_output_limit_exceeded_by_text(self):
+        template = holtzman.from_string("12345\n  67890")
+        with pytest.raises(RenderLimitError) as error:
+            template.render({}, RenderLimits(max_output_size=5))
+
+        assert error.value.error_code == ErrorCode.OUTPUT_LIMIT_EXCEEDED
+        assert error.value.position == (1, 1)
+
+    def test_output_limit_exceeded_by_variable(self):
+        template = holtzman.from_string("12345{{ variable }}")
+        with pytest.raises(RenderLimitError) as error:
+            template.render({"variable": "value"}, RenderLimits(max_output_size=8))
+
+        assert error.value.error_code == ErrorCode.OUTPUT_LIMIT_EXCEEDED
+        assert error.value.position == (1, 6)
+
+    def test_iteration_limit_counts_nested_loops(self):
+        source = "{% for var in variables %} {% for sub_var in var %}{{ sub_var }}{% end %}{% end %}"
+        template = holtzman.from_string(source)
+        variables = {"variables": [["a", "b"], ["c", "d"]]}
+
+        assert template.render(variables, RenderLimits(max_iterations=6)) == " ab cd"
+
+        with pytest.raises(RenderLimitError) as error:
+            template.render(variables, RenderLimits(max_iterations=5))
+
+        assert error.value.error_code == ErrorCode.ITERATION_LIMIT_EXCEEDED
+        assert error.value.position == (1, 28)
+
+    def test_deadline_exceeded(self):
+        template = holtzman.from_string("{% for var in variables %}{{ var }}{% end %}")
+        with pytest.raises(RenderLimitError) as error:
+            template.render({"variables": range(10)}, RenderLimits(timeout=-1))
+
+        assert error.value.error_code == ErrorCode.RENDER_DEADLINE_EXCEEDED
+        assert error.value.position == (1, 1)
+
+    def test_render_is_unlimited_by_default(self):
+        template = holtzman.from_string("{% for var in variables %}{{ var }}{% end %}")
+        result = template.render({"variables": range(1000)})
+        assert len(result) == sum(len(str(i)) for i in range(1000))
+
+    def test_output_limit_counts_bytes_in_every_render_mode(self):
+        template = holtzman.from_string("héllo {{ variable }}")
+        variables = {"variable": "wörld"}
+        limits = RenderLimits(max_output_size=len("héllo wörld".encode('utf-8')))
+
+        assert template.render(variables, limits) == "héllo wörld"
+        assert template.render_bytes(variables, limits) == "héllo wörld".encode('utf-8')
+
+        limits = RenderLimits(max_output_size=len("héllo wörld"))
+        for render in (template.render, template.render_bytes):
+            with pytest.raises(RenderLimitError) as error:
+                render(variables, limits)
+
+            assert error.value.position == (1, 7)
+
+    def test_lone_surrogates_are_counted_and_rendered(self):
+        template = holtzman.from_string("{{ variable }}")
+        variables = {"variable": "a\ud800b"}
+
+        assert template.render(variables) == "a\ud800b"
+        assert template.render(variables, RenderLimits(max_output_size=5)) == "a\ud800b"
+
+    def test_render_limit_error_is_a_template_error(self):
+        template = holtzman.from_string("12345")
+        with pytest.raises(TemplateError) as error:
+            template.render({}, RenderLimits(max_output_size=1))
+
+        assert isinstance(error.value, RenderLimitError)
+        assert repr(error.value) == f"(1, 1):{ErrorCode.OUTPUT_LIMIT_EXCEEDED}"
@@ -0,0 +1,100 @@
+"""
+Test incremental rendering, for example:
+
+    session = template.session()
+    session.render(variables)
+    session.render(new_variables)
+
+should only re-render the if conditions and for loops whose variables changed
+and produce the same output as a full render
+"""
+import holtzman
+from holtzman.variables import Lazy
+
+from .helpers import Counter, Renderable
+
+
+SOURCE = "{{ title }}|{% for item in items %}{{ item }},{% end %}|{% if show %}{% for s in stats %}{{ s }}{% end %}{% end %}"
+
+
+class RenderSessionTests:
+    def test_session_output_matches_full_render(self):
+        template = holtzman.from_string(SOURCE)
+        session = template.session()
+        renders = [
+            {"title": "a", "items": [1, 2], "show": True, "stats": ["x"]},
+            {"title": "b", "items": [1, 2], "show": True, "stats": ["x"]},
+            {"title": "b", "items": [1, 3], "show": True, "stats": ["x", "y"]},
+            {"title": "b", "items": [1, 3], "show": False, "stats": ["x", "y"]},
+            {"title": "b", "items": [], "show": True, "stats": ["z"]},
+        ]
+        for variables in renders:
+            assert session.render(variables) == template.render(variables)
+
+    def test_unchanged_blocks_are_not_re_rendered(self):
+        template = holtzman.from_string(SOURCE)
+        session = template.session()
+        item = Renderable("i")
+        stat = Renderable("x")
+        items = [item]
+        stats = [stat]
+
+        assert session.render({"title": "a", "items": items, "show": True, "stats": Lazy(Counter(stats))}) == "a|i,|x"
+        assert session.render({"title": "b", "items": items, "show": True, "stats": Lazy(Counter(stats))}) == "b|i,|x"
+        assert item.renders == 1
+        assert stat.renders == 1
+
+        assert session.render({"title": "b", "items": items, "show": True, "stats": [stat]}) == "b|i,|x"
+        assert item.renders == 1
+        assert stat.renders == 2
+
+    def test_change_set_limits_re_rendering(self):
+        template = holtzman.from_string(SOURCE)
+        session = template.session()
+        items = [1, 2]
+        variables = {"title": "a", "items": items, "show": True, "stats": ["x"]}
+
+        assert session.render(variables) == "a|1,2,|x"
+
+        items.append(3)
+        assert session.render(variables, changed=[]) == "a|1,2,|x"
+        assert session.render(variables, changed=["items"]) == "a|1,2,3,|x"
+
+    def test_change_set_matches_nested_paths(self):
+        template = holtzman.from_string("{% if data.show %}{{ data.value }}{% end %}")
+        session = template.session()
+        data = {"show": True, "value": 1}
+
+        assert session.render({"data": data}) == "1"
+
+        data["value"] = 2
+        assert session.render({"data": data}, changed=["data.other"]) == "1"
+        assert session.render({"data": data}, changed=["data.value"]) == "2"
+
+        data["value"] = 3
+        assert session.render({"data": data}, changed=["data"]) == "3"
+
+    def test_loop_variables_are_not_tracked_as_root_variables(self):
+        template = holtzman.from_string("{% for title in items %}{{ title }}{% end %}{{ title }}")
+        session = template.session()
+
+        assert session.render({"items": ["a"], "title": "b"}) == "ab"
+        assert session.render({"items": ["a"], "title": "c"}, changed=["title"]) == "ac"
+
+    def test_cached_loop_body_is_reused(self):
+        template = holtzman.from_string("{{ title }}{% for item in items %}{{ item }}{% end %}")
+        session = template.session()
+        items = [Renderable("item"), Renderable("item")]
+
+        assert session.render({"title": "a", "items": items}) == "aitemitem"
+        assert session.render({"title": "b", "items": items}) == "bitemitem"
+        assert [item.renders for item in items] == [1, 1]
+
+    def test_equal_values_of_different_types_are_re_rendered(self):
+        template = holtzman.from_string("{% for x in xs %}{{ x }}{% end %}{% if flag %}{{ flag }}{% end %}")
+        session = template.session()
+
+        assert session.render({"xs": [1, 2], "flag": 1}) == "121"
+
+        variables = {"xs": [True, 2.0], "flag": True}
+        assert session.render(variables) == template.render(variables) == "True2.0True"
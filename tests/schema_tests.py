@@ -0,0 +1,151 @@
+"""
+Test templates compiled against a context schema, for example:
+
+    holtzman.from_string(source, schema=Context)
+
+should check every variable path against the schema at compile time and
+render the same result as a template compiled without one
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import pytest
+from typing_extensions import TypedDict
+
+import holtzman
+from holtzman.errors import TemplateError, ErrorCode, MissingVariableError
+from holtzman.variables import Lazy
+
+
+@dataclass
+class Item:
+    name: str
+    visible: bool
+
+    @property
+    def label(self) -> str:
+        return self.name.upper()
+
+    def describe(self) -> str:
+        return f'item {self.name}'
+
+
+@dataclass
+class Page:
+    title: str
+    items: List[Item]
+    groups: List[List[Item]]
+    extra: Dict[str, Any]
+    footer: Optional[Item] = None
+    options: Optional[Dict[str, str]] = None
+    count: int = 0
+    related: Optional[List[Item]] = None
+
+
+class Settings(TypedDict):
+    title: str
+    page: Page
+
+
+PAGE = Page(title="page",
+            items=[Item("a", True), Item("b", False)],
+            groups=[[Item("c", True)], [Item("d", True)]],
+            extra={"nested": {"value": 0}},
+            footer=Item("f", True))
+
+
+class SchemaTests:
+    @pytest.mark.parametrize('source', [
+        "{{ title }}",
+        "{% for item in items %}{% if item.visible %}{{ item.name }}{% end %}{% end %}",
+        "{% for group in groups %}{% for item in group %}{{ item.label }}{{ title }}{% end %}{% end %}",
+        "{{ extra.nested.value }}",
+        "{{ footer.name }} {{ footer.describe }}",
+    ])
+    def test_schema_template_renders_same_as_generic(self, source):
+        generic = holtzman.from_string(source)
+        specialized = holtzman.from_string(source, schema=Page)
+        assert specialized.render(PAGE) == generic.render(PAGE)
+        assert specialized.render_bytes(PAGE) == generic.render_bytes(PAGE)
+
+    def test_typed_dict_schema_uses_key_access(self):
+        source = "{{ title }} {% for item in page.items %}{{ item.name }}{% end %}"
+        template = holtzman.from_string(source, schema=Settings)
+        assert template.render({"title": "settings", "page": PAGE}) == "settings ab"
+
+    @pytest.mark.parametrize('source, position', [
+        ("12345{{ missing }}", (1, 6)),
+        ("{{ title.missing }}", (1, 1)),
+        ("{% for item in items %}{{ item.missing }}{% end %}", (1, 24)),
+        ("{% for item in items %}{% end %}{{ item.name }}", (1, 33)),
+        ("{% if items.name %}{% end %}", (1, 1)),
+    ])
+    def test_unknown_paths_are_reported_at_compile_time(self, source, position):
+        with pytest.raises(TemplateError) as error:
+            holtzman.from_string(source, schema=Page)
+
+        assert error.value.error_code == ErrorCode.UNKNOWN_VARIABLE
+        assert error.value.position == position
+
+    def test_falsy_values_are_not_treated_as_missing(self):
+        template = holtzman.from_string("{{ extra.nested.value }}:{{ footer }}", schema=Page)
+        page = Page(title="", items=[], groups=[], extra={"nested": {"value": 0}})
+        assert template.render(page) == "0:None"
+
+    def test_value_missing_at_render_raises_missing_variable(self):
+        template = holtzman.from_string("{{ extra.nested.value }}", schema=Page)
+        page = Page(title="", items=[], groups=[], extra={})
+        with pytest.raises(MissingVariableError) as error:
+            template.render(page)
+
+        assert error.value.variable == 'extra.nested.value'
+
+    def test_lazy_values_are_resolved(self):
+        template = holtzman.from_string("{{ title }}", schema=Settings)
+        assert template.render({"title": Lazy(lambda: "lazy"), "page": PAGE}) == "lazy"
+
+    def test_session_renders_schema_template(self):
+        template = holtzman.from_string("{{ title }}{% for item in items %}{{ item.name }}{% end %}", schema=Page)
+        session = template.session()
+        assert session.render(PAGE) == "pageab"
+        assert session.render(PAGE, changed=["title"]) == "pageab"
+
+    def test_none_optional_mapping_raises_missing_variable(self):
+        template = holtzman.from_string("{{ options.colour }}", schema=Page)
+        with pytest.raises(MissingVariableError) as error:
+            template.render(PAGE)
+
+        assert error.value.variable == 'options.colour'
+
+    def test_errors_raised_by_lazy_values_propagate(self):
+        def fail():
+            raise KeyError('boom')
+
+        template = holtzman.from_string("{{ title }}", schema=Settings)
+        with pytest.raises(KeyError):
+            template.render({"title": Lazy(fail), "page": PAGE})
+
+    def test_unresolvable_schema_annotations_are_reported(self):
+        @dataclass
+        class Local:
+            item: 'Undefined'  # noqa: F821
+
+        with pytest.raises(TemplateError) as error:
+            holtzman.from_string("12345{{ item }}", schema=Local)
+
+        assert error.value.error_code == ErrorCode.INVALID_SCHEMA
+        assert error.value.position == (1, 6)
+
+    @pytest.mark.parametrize('source', ["{% for i in count %}{% end %}", "12345{% for i in footer %}{% end %}"])
+    def test_non_iterable_loop_collections_are_reported(self, source):
+        with pytest.raises(TemplateError) as error:
+            holtzman.from_string(source, schema=Page)
+
+        assert error.value.error_code == ErrorCode.NOT_ITERABLE
+
+    def test_none_optional_loop_collection_raises_missing_variable(self):
+        template = holtzman.from_string("{% for item in related %}{{ item.name }}{% end %}", schema=Page)
+        with pytest.raises(MissingVariableError) as error:
+            template.render(PAGE)
+
+        assert error.value.variable == 'related'
@@ -83,3 +83,7 @@ class SimpleSubstitutionTests:
             "variable3": "value_3"
         })
         assert result == "value_1 value_2 value_3"
+
+    def test_lone_surrogates_in_template_text_are_accepted(self):
+        template = holtzman.from_string("a\ud800b")
+        assert template.render({}) == "a\ud800b"
@@ -0,0 +1,68 @@
+"""
+Test templates can be warmed up before forking, for example:
+
+    templates = holtzman.warm_up(['template.hz'])
+
+should compile and compact every template and freeze them out of the
+garbage collector
+"""
+import gc
+import os
+from typing import List
+
+import pytest
+
+import holtzman
+from holtzman.errors import TemplateError
+
+
+class WarmUpTests:
+    def teardown_method(self):
+        gc.unfreeze()
+
+    def test_warm_up_compiles_and_freezes_templates(self):
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        test_file = f'{dir_path}/templates/example_template.hz'
+        variables = {"items": ["one", "two"]}
+
+        templates = holtzman.warm_up([test_file])
+
+        assert list(templates) == [test_file]
+        assert templates[test_file].render(variables) == holtzman.from_file(test_file).render(variables)
+        assert gc.get_freeze_count() > 0
+
+    def test_compacted_template_renders_the_same(self):
+        source = "{% for var in variables %}{% if var %}{{ var }}{% end %}{% end %}text"
+        variables = {"variables": ["a", "", "b"]}
+        template = holtzman.from_string(source)
+        compacted = holtzman.from_string(source)
+        compacted.compact()
+
+        assert compacted.render(variables) == template.render(variables)
+        assert compacted.render_bytes(variables) == template.render_bytes(variables)
+        assert compacted.session().render(variables) == template.render(variables)
+
+    def test_compact_can_be_called_more_than_once(self):
+        template = holtzman.from_string("{{ variable }}")
+        template.compact()
+        template.compact()
+        assert template.render({"variable": "value"}) == "value"
+
+    def test_warm_up_compiles_against_schemas(self):
+        class Context:
+            items: List[str]
+
+            def __init__(self, items: List[str]):
+                self.items = items
+
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        test_file = f'{dir_path}/templates/example_template.hz'
+        templates = holtzman.warm_up([test_file], schemas={test_file: Context})
+
+        assert "<li>one</li>" in templates[test_file].render(Context(["one"]))
+
+        class Invalid:
+            other: List[str]
+
+        with pytest.raises(TemplateError):
+            holtzman.warm_up([test_file], schemas={test_file: Invalid})